@@ -1,107 +1,191 @@
 import yt_dlp
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import os
+import pathlib
 from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 
-# Konfigurasi logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('youtube_downloader.log'),
-        logging.StreamHandler()
-    ]
-)
+# Konfigurasi logging: thread hanya memasukkan record ke queue, lalu
+# QueueListener di background yang menulis ke file dan console, sehingga
+# thread download tidak terblokir oleh flush I/O log
+_log_queue = queue.Queue(-1)
+_log_handlers = [
+    logging.FileHandler('youtube_downloader.log', delay=True),
+    logging.StreamHandler()
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(_log_queue)])
+
+_log_listener = QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
 def setup_download_folder(folder: str) -> None:
     """
     Membuat dan memvalidasi folder download
     """
-    if not os.path.exists(folder):
-        try:
-            os.makedirs(folder)
-            logging.info(f"Folder {folder} berhasil dibuat")
-        except Exception as e:
-            logging.error(f"Gagal membuat folder {folder}: {e}")
-            raise
+    try:
+        os.makedirs(folder, exist_ok=True)
+    except OSError as e:
+        logging.error(f"Gagal membuat folder {folder}: {e}")
+        raise
+
+# Cache metadata di disk supaya run ulang pada playlist yang sama
+# tidak mengulang request jaringan. Import dan pembuatan cache ditunda
+# sampai pemakaian pertama supaya modul tetap bisa diimport sebelum
+# auto-install dependensi di __main__ sempat berjalan
+_meta_cache = None
+_META_CACHE_TTL = 86400  # detik
+
+def _get_meta_cache():
+    global _meta_cache
+    if _meta_cache is None:
+        from diskcache import Cache
+        _meta_cache = Cache('.yt_meta_cache')
+    return _meta_cache
+
+def _canonical_video_id(url: str) -> str:
+    """
+    Mengambil ID video kanonik dari URL (tanpa parameter list/t) agar video
+    yang sama pada playlist berbeda memakai entri cache yang sama
+    """
+    parsed = urlparse(url)
+    video_id = parse_qs(parsed.query).get('v', [None])[0]
+    if video_id:
+        return video_id
+    return parsed.path.rstrip('/').rsplit('/', 1)[-1] or url
 
-def get_video_info(url: str, is_playlist_item: bool = False) -> Dict:
+def _is_archived(archive_path: pathlib.Path, video_id: str) -> bool:
     """
-    Mengambil informasi video dengan penanganan error yang lebih baik
+    Mengecek apakah video sudah tercatat selesai di arsip download yt-dlp
+    (format baris arsip: '<extractor> <id>')
     """
     try:
-        ydl_opts = {
-            'quiet': True,
-            'force_generic_extractor': True,
-            'extract_flat': True if is_playlist_item else False,
-            'no_warnings': True
-        }
-        
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info_dict = ydl.extract_info(url, download=False)
-            return {
-                'judul': info_dict.get('title', 'Tidak tersedia'),
-                'url': url,
-                'durasi_detik': info_dict.get('duration', 0),
-                'durasi_menit': round(info_dict.get('duration', 0) / 60, 2) if info_dict.get('duration') else 0,
-                'channel': info_dict.get('uploader', 'Tidak tersedia'),
-                'jumlah_views': info_dict.get('view_count', 0),
-                'tanggal_publikasi': datetime.strptime(info_dict.get('upload_date', '19700101'), '%Y%m%d').strftime('%Y-%m-%d') if info_dict.get('upload_date') else 'Tidak tersedia',
-                'deskripsi': info_dict.get('description', 'Tidak tersedia')
-            }
-    except Exception as e:
-        logging.error(f"Gagal mengambil info untuk {url}: {str(e)}")
-        return {
-            'judul': 'Tidak tersedia',
-            'url': url,
-            'durasi_detik': 0,
-            'durasi_menit': 0,
-            'channel': 'Tidak tersedia',
-            'jumlah_views': 0,
-            'tanggal_publikasi': 'Tidak tersedia',
-            'deskripsi': 'Tidak tersedia'
-        }
+        with open(archive_path) as archive:
+            return any(line.strip().rsplit(' ', 1)[-1] == video_id for line in archive)
+    except OSError:
+        return False
+
+def _format_upload_date(upload_date: Optional[str]) -> str:
+    """
+    Memformat upload_date YYYYMMDD menjadi YYYY-MM-DD lewat slicing,
+    jauh lebih murah daripada datetime.strptime per video
+    """
+    if upload_date and len(upload_date) == 8:
+        return f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
+    return 'Tidak tersedia'
 
-def download_video(url: str, download_folder: str) -> bool:
+def _build_video_row(info_dict: Dict, url: str) -> Dict:
+    """
+    Memetakan info_dict yt-dlp menjadi satu baris metadata
     """
-    Mendownload video dengan penanganan error dan progress callback
+    duration = info_dict.get('duration', 0)
+    return {
+        'judul': info_dict.get('title', 'Tidak tersedia'),
+        'url': url,
+        'durasi_detik': duration,
+        'durasi_menit': round(duration / 60, 2) if duration else 0,
+        'channel': info_dict.get('channel') or info_dict.get('uploader', 'Tidak tersedia'),
+        'jumlah_views': info_dict.get('view_count', 0),
+        'tanggal_publikasi': _format_upload_date(info_dict.get('upload_date')),
+        'deskripsi': info_dict.get('description', 'Tidak tersedia')
+    }
+
+# Template opsi download; per panggilan hanya path output, arsip, dan
+# progress hook yang berbeda
+_DOWNLOAD_OPTS_TEMPLATE = {
+    'format': 'best',
+    'socket_timeout': 30,
+    'http_chunk_size': 10485760,
+    'concurrent_fragment_downloads': 8,
+    'hls_prefer_native': True,
+    'ignoreerrors': True,
+    'no_warnings': True,
+    'quiet': False
+}
+
+def download_video(url: str, download_folder: str) -> Optional[Dict]:
     """
+    Mendownload video dan mengambil metadatanya dalam satu panggilan
+    extract_info, sehingga stream hanya di-resolve sekali per video.
+    Mengembalikan baris metadata, atau None bila download gagal.
+    """
+    last_logged = [None]
+
     def progress_hook(d):
+        judul = d.get('info_dict', {}).get('title', '')
         if d['status'] == 'downloading':
-            progress = d.get('_percent_str', '0%')
-            logging.info(f"Downloading: {progress}")
+            # Hook yt-dlp terpanggil berkali-kali per detik; log hanya saat
+            # progresnya berubah supaya volume log tidak meledak. Hitung dari
+            # jumlah byte, bukan _percent_str yang berisi format tampilan
+            # (bisa mengandung kode warna ANSI)
+            downloaded = d.get('downloaded_bytes') or 0
+            total = d.get('total_bytes') or d.get('total_bytes_estimate')
+            if total:
+                progress = f"{int(downloaded * 100 / total)}%"
+            else:
+                progress = f"{downloaded // 1048576}MB"
+            if progress != last_logged[0]:
+                last_logged[0] = progress
+                logging.info(f"Downloading {judul}: {progress}")
         elif d['status'] == 'finished':
             logging.info(f"Download selesai: {d['filename']}")
 
     try:
+        folder = pathlib.Path(download_folder)
+        archive_path = folder / '.yt_archive.txt'
+        cache_key = _canonical_video_id(url)
+
+        # Video yang sudah ada di arsip dan cache metadata tidak perlu
+        # menyentuh jaringan sama sekali saat run ulang
+        cached = _get_meta_cache().get(cache_key)
+        if cached is not None and _is_archived(archive_path, cache_key):
+            logging.info(f"Melewati {cached['judul']}: sudah didownload sebelumnya")
+            return cached
+
         ydl_opts = {
-            'outtmpl': os.path.join(download_folder, '%(title)s.%(ext)s'),
-            'format': 'best',
-            'progress_hooks': [progress_hook],
-            'ignoreerrors': True,
-            'no_warnings': True,
-            'quiet': False
+            **_DOWNLOAD_OPTS_TEMPLATE,
+            'outtmpl': str(folder / '%(title)s.%(ext)s'),
+            # Arsip download membuat yt-dlp melewati video yang sudah
+            # selesai di run sebelumnya tanpa request jaringan
+            'download_archive': str(archive_path),
+            'progress_hooks': [progress_hook]
         }
         
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
-        return True
+            info_dict = ydl.extract_info(url, download=True)
+
+        if info_dict is None:
+            return None
+
+        video_info = _build_video_row(info_dict, url)
+        _get_meta_cache().set(cache_key, video_info, expire=_META_CACHE_TTL, tag='yt_meta')
+        return video_info
     except Exception as e:
         logging.error(f"Error saat mendownload {url}: {str(e)}")
-        return False
+        return None
 
-def download_single_video(url: str, download_folder: str) -> Optional[Dict]:
+def download_single_video(url: str, download_folder: str,
+                          emit_excel: bool = False) -> Optional[Dict]:
     """
-    Mendownload single video YouTube dan menyimpan informasinya
+    Mendownload single video YouTube dan menyimpan informasinya.
+    File Excel hanya ditulis bila emit_excel=True karena to_excel jauh
+    lebih lambat daripada CSV/Parquet.
     """
     try:
         setup_download_folder(download_folder)
         logging.info(f"Memproses video: {url}")
         
-        video_info = get_video_info(url)
-        if download_video(url, download_folder):
+        video_info = download_video(url, download_folder)
+        if video_info is not None:
             logging.info("Video berhasil didownload")
             
             # Menyimpan informasi ke file
@@ -110,13 +194,20 @@ def download_single_video(url: str, download_folder: str) -> Optional[Dict]:
             
             csv_filename = f'youtube_video_{timestamp}.csv'
             excel_filename = f'youtube_video_{timestamp}.xlsx'
-            
-            df.to_csv(csv_filename, index=False, encoding='utf-8-sig')
-            df.to_excel(excel_filename, index=False)
-            
+            parquet_filename = f'youtube_video_{timestamp}.parquet'
+
+            # Buffer 1MB menekan jumlah syscall saat menulis CSV
+            with open(csv_filename, 'wb', buffering=2**20) as buf:
+                df.to_csv(buf, index=False, encoding='utf-8-sig')
+            df.to_parquet(parquet_filename, compression='zstd')
+
             logging.info(f"\nInformasi video telah disimpan ke:")
             logging.info(f"- CSV: '{csv_filename}'")
-            logging.info(f"- Excel: '{excel_filename}'")
+            logging.info(f"- Parquet: '{parquet_filename}'")
+
+            if emit_excel:
+                df.to_excel(excel_filename, index=False, engine='xlsxwriter')
+                logging.info(f"- Excel: '{excel_filename}'")
             
             return video_info
         else:
@@ -127,9 +218,11 @@ def download_single_video(url: str, download_folder: str) -> Optional[Dict]:
         logging.error(f"Error saat memproses video: {str(e)}")
         return None
 
-def extract_playlist_info(playlist_url: str, download_folder: str = "downloaded_videos") -> Optional[List[Dict]]:
+def extract_playlist_info(playlist_url: str, download_folder: str = "downloaded_videos",
+                          emit_excel: bool = False) -> Optional[List[Dict]]:
     """
-    Mengekstrak informasi playlist YouTube dan mendownload video dengan progress tracking
+    Mengekstrak informasi playlist YouTube dan mendownload video dengan
+    progress tracking. File Excel hanya ditulis bila emit_excel=True.
     """
     try:
         setup_download_folder(download_folder)
@@ -148,41 +241,67 @@ def extract_playlist_info(playlist_url: str, download_folder: str = "downloaded_
             logging.error("Gagal mendapatkan informasi playlist")
             return None
             
-        logging.info(f"Mengekstrak playlist: {playlist_info['title']}")
-        
-        video_data = []
+        # Hoist nilai yang tidak berubah keluar dari loop per-video
+        playlist_title = playlist_info['title']
+        entries = playlist_info['entries']
+
+        logging.info(f"Mengekstrak playlist: {playlist_title}")
+
+        # Buang entri duplikat; playlist bisa memuat video yang sama dua kali
+        seen_ids = set()
+        unique_entries = []
+        for video in entries:
+            video_id = _canonical_video_id(video['url'])
+            if video_id in seen_ids:
+                continue
+            seen_ids.add(video_id)
+            unique_entries.append(video)
+        entries = unique_entries
+
         failed_downloads = []
-        total_videos = len(playlist_info['entries'])
-        
-        for index, video in enumerate(playlist_info['entries'], 1):
-            try:
-                video_url = video['url']
-                logging.info(f"\nMemproses video {index}/{total_videos}")
-                
-                video_info = get_video_info(video_url, is_playlist_item=True)
-                video_info['playlist'] = playlist_info['title']
-                video_info['urutan_playlist'] = index
-                video_data.append(video_info)
-                
-                if not download_video(video_url, download_folder):
+        total_videos = len(entries)
+        video_data = [None] * total_videos
+
+        # Satu pass per video: extract_info(download=True) mendownload
+        # sekaligus mengambil metadata, jadi stream hanya di-resolve sekali
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            future_to_index = {
+                executor.submit(download_video, video['url'], download_folder): (index, video['url'])
+                for index, video in enumerate(entries, 1)
+            }
+
+            for future in as_completed(future_to_index):
+                index, video_url = future_to_index[future]
+                try:
+                    video_info = future.result()
+                    if video_info is None:
+                        failed_downloads.append(video_url)
+                        continue
+                    video_info |= {'playlist': playlist_title, 'urutan_playlist': index}
+                    video_data[index - 1] = video_info
+                    logging.info(f"Video {index}/{total_videos} selesai diproses")
+                except Exception as e:
+                    logging.error(f"Error pada video {index}: {str(e)}")
                     failed_downloads.append(video_url)
-                    
-            except Exception as e:
-                logging.error(f"Error pada video {index}: {str(e)}")
-                failed_downloads.append(video_url)
-                continue
-        
+
+        video_data = [info for info in video_data if info is not None]
+
         # Menyimpan data ke file
         if video_data:
-            df = pd.DataFrame(video_data)
+            # Bangun DataFrame per kolom sekali jalan; lebih murah daripada
+            # konversi dict -> baris satu per satu untuk playlist besar
+            columns = list(video_data[0].keys())
+            df = pd.DataFrame({col: [row.get(col) for row in video_data] for col in columns})
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             
             csv_filename = f'youtube_playlist_{timestamp}.csv'
-            df.to_csv(csv_filename, index=False, encoding='utf-8-sig')
-            
-            excel_filename = f'youtube_playlist_{timestamp}.xlsx'
-            df.to_excel(excel_filename, index=False)
+            # Buffer 1MB menekan jumlah syscall saat menulis CSV
+            with open(csv_filename, 'wb', buffering=2**20) as buf:
+                df.to_csv(buf, index=False, encoding='utf-8-sig')
             
+            parquet_filename = f'youtube_playlist_{timestamp}.parquet'
+            df.to_parquet(parquet_filename, compression='zstd')
+
             logging.info(f"\nRingkasan:")
             logging.info(f"Total video dalam playlist: {total_videos}")
             logging.info(f"Video berhasil didownload: {total_videos - len(failed_downloads)}")
@@ -195,7 +314,12 @@ def extract_playlist_info(playlist_url: str, download_folder: str = "downloaded_
             
             logging.info(f"\nData telah disimpan ke:")
             logging.info(f"- CSV: '{csv_filename}'")
-            logging.info(f"- Excel: '{excel_filename}'")
+            logging.info(f"- Parquet: '{parquet_filename}'")
+
+            if emit_excel:
+                excel_filename = f'youtube_playlist_{timestamp}.xlsx'
+                df.to_excel(excel_filename, index=False, engine='xlsxwriter')
+                logging.info(f"- Excel: '{excel_filename}'")
             
         return video_data
         
@@ -205,15 +329,15 @@ def extract_playlist_info(playlist_url: str, download_folder: str = "downloaded_
 
 if __name__ == "__main__":
     try:
-        # Mengecek dan menginstall dependensi yang diperlukan
-        required_packages = ['openpyxl', 'pandas', 'yt-dlp']
-        for package in required_packages:
-            try:
-                __import__(package)
-            except ImportError:
-                logging.info(f"Menginstall {package}...")
-                import subprocess
-                subprocess.check_call(['pip', 'install', package])
+        # Mengecek dependensi tanpa mengimportnya (find_spec tidak menjalankan
+        # kode modul) dan menginstall yang kurang dalam satu panggilan pip
+        from importlib.util import find_spec
+        required_packages = ['xlsxwriter', 'pandas', 'yt-dlp', 'diskcache', 'pyarrow']
+        missing = [p for p in required_packages if find_spec(p.replace('-', '_')) is None]
+        if missing:
+            logging.info(f"Menginstall {', '.join(missing)}...")
+            import subprocess
+            subprocess.check_call(['pip', 'install', *missing])
         
         # Meminta input mode download
         print("\nPilih mode download:")
@@ -229,14 +353,15 @@ if __name__ == "__main__":
         # Meminta input URL dan folder
         url = input("Masukkan URL YouTube: ").strip()
         download_folder = input("Masukkan folder untuk menyimpan video (default: downloaded_videos): ").strip() or "downloaded_videos"
+        emit_excel = input("Simpan juga ke Excel? (y/N): ").strip().lower() == 'y'
         
         # Proses sesuai mode yang dipilih
         if mode == '1':
-            result = download_single_video(url, download_folder)
+            result = download_single_video(url, download_folder, emit_excel=emit_excel)
             if result is None:
                 logging.error("Gagal memproses video")
         else:
-            result = extract_playlist_info(url, download_folder)
+            result = extract_playlist_info(url, download_folder, emit_excel=emit_excel)
             if result is None:
                 logging.error("Gagal memproses playlist")
             